@@ -2,7 +2,13 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import json
+import hashlib
+import pickle
 import numpy as np
+import pyarrow as pa
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from scipy import stats
 import scipy.stats as stats
 
@@ -10,9 +16,77 @@ import scipy.stats as stats
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
 
-def load_data():
+# Named string predicates, declared once and shared by every analysis
+STRING_PREDICATES = {
+    'auto_renew_25_off': '25.00% Off Auto renew',
+    'gift': 'Gift',
+    'free': 'FREE',
+}
+
+# Product/discount columns that are dictionary-encoded at load time
+DICTIONARY_COLUMNS = ['ITEM_SKU', 'ITEM_NAME', 'DISCOUNT_CODE']
+
+# Below this many rows per shard, process start-up costs more than it saves
+MIN_ROWS_PER_SHARD = 50_000
+
+# Input CSVs and cleaned tables covered by the Arrow snapshot
+INPUT_FILES = [
+    'orders_master_table.csv',
+    'orders_sku_master_table.csv',
+    'orders_attribution_table.csv',
+    'periods_weeks_reference.csv'
+]
+SNAPSHOT_TABLES = ['orders_master', 'orders_sku', 'orders_attribution', 'periods_weeks']
+
+# Tables with CUSTOMER_ID are sorted into this many customer hash buckets in the snapshot
+SNAPSHOT_BUCKETS = 64
+
+def build_dictionary_index(df):
+    """Dictionary-encode product/discount columns into a categorical <COLUMN>_CAT per column
+    
+    The raw string columns are left untouched so grouping and plotting behave as before; the
+    categorical copy carries its own categories through filters, copies and merges. Once encoded,
+    raw columns must only be rewritten through replace_dictionary_values so the copies stay in sync.
+    """
+    for column in DICTIONARY_COLUMNS:
+        if column in df.columns:
+            df[f'{column}_CAT'] = df[column].astype('category')
+    return df
+
+def replace_dictionary_values(df, column, to_replace, value):
+    """Replace values in a product/discount column, re-encoding its <COLUMN>_CAT copy to match"""
+    df[column] = df[column].replace(to_replace, value)
+    if f'{column}_CAT' in df.columns:
+        df[f'{column}_CAT'] = df[column].astype('category')
+    return df
+
+def dictionary_column(df, column):
+    """Categorical view of a column, encoding it on the fly if build_dictionary_index was not run"""
+    encoded = f'{column}_CAT'
+    return df[encoded] if encoded in df.columns else df[column].astype('category')
+
+@lru_cache(maxsize=64)
+def category_flags(dtype, predicate):
+    """Predicate flag per category code; CategoricalDtype hashes by value, so equal categories share an entry"""
+    matches = np.asarray(
+        dtype.categories.str.contains(STRING_PREDICATES[predicate], case=False, na=False),
+        dtype=bool
+    )
+    # Trailing False so missing values (code -1) look up as unflagged
+    return np.append(matches, False)
+
+def predicate_flag(df, column, predicate):
+    """Per-row flag for a named predicate, evaluated once per distinct value and looked up by code"""
+    series = dictionary_column(df, column)
+    flags = category_flags(series.dtype, predicate)
+    return pd.Series(flags[series.cat.codes.to_numpy()], index=df.index)
+
+def get_data_dir():
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(os.path.dirname(current_dir), 'data')
+    return os.path.join(os.path.dirname(current_dir), 'data')
+
+def load_data():
+    data_dir = get_data_dir()
     
     orders_master = pd.read_csv(os.path.join(data_dir, 'orders_master_table.csv'))
     orders_sku = pd.read_csv(os.path.join(data_dir, 'orders_sku_master_table.csv'))
@@ -22,6 +96,10 @@ def load_data():
     # Convert dates to datetime
     orders_master['CREATED_AT'] = pd.to_datetime(orders_master['CREATED_AT'])
     
+    # Encode repeated product/discount strings once so predicates run per distinct value
+    build_dictionary_index(orders_master)
+    build_dictionary_index(orders_sku)
+    
     return orders_master, orders_sku, orders_attribution, periods_weeks
 
 def merge_with_periods(df, periods_weeks):
@@ -30,6 +108,136 @@ def merge_with_periods(df, periods_weeks):
     df['DATE'] = df['CREATED_AT'].dt.strftime('%Y-%m-%d')
     return df.merge(periods_weeks, on='DATE', how='left')
 
+def summarize_histogram(values, bins):
+    """Histogram bin counts and edges, computed once so plots do not re-bin raw rows"""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        # Nothing to bin: an empty summary renders as an empty chart
+        return {'counts': np.zeros(0, dtype=int), 'edges': np.zeros(1)}
+    counts, edges = np.histogram(values, bins=bins)
+    return {'counts': counts, 'edges': edges}
+
+def summarize_boxplot(values, label, whis=1.5, max_fliers=1000, seed=0):
+    """Box-plot statistics (quartiles, whiskers, capped outlier sample) in Axes.bxp format
+    
+    Returns None when there are no non-missing values, matching sns.boxplot skipping the group.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    
+    # Whiskers reach the most extreme points within whis * IQR of the box
+    whislo = values[values >= q1 - whis * iqr].min()
+    whishi = values[values <= q3 + whis * iqr].max()
+    fliers = values[(values < whislo) | (values > whishi)]
+    
+    # Keep the outlier sample small enough to render in constant time
+    if len(fliers) > max_fliers:
+        rng = np.random.default_rng(seed)
+        fliers = np.sort(rng.choice(fliers, max_fliers, replace=False))
+    
+    return {
+        'label': label,
+        'med': med,
+        'q1': q1,
+        'q3': q3,
+        'whislo': whislo,
+        'whishi': whishi,
+        'fliers': fliers,
+        'n': len(values)
+    }
+
+def plot_histogram_summary(summary, ax=None, **kwargs):
+    """Render a pre-binned histogram summary as bars"""
+    ax = ax or plt.gca()
+    edges = summary['edges']
+    return ax.bar(edges[:-1], summary['counts'], width=np.diff(edges), align='edge',
+                  edgecolor='white', linewidth=0.5, **kwargs)
+
+def plot_boxplot_summary(summaries, ax=None):
+    """Render box-plot summaries without passing raw rows to the plotting library"""
+    ax = ax or plt.gca()
+    ax.bxp(summaries, patch_artist=True, widths=0.8,
+           boxprops={'facecolor': sns.color_palette()[0]},
+           medianprops={'color': 'black'},
+           flierprops={'marker': 'd', 'markersize': 4})
+    return ax
+
+def customer_shard_ids(df, n_shards):
+    """Shard number for each row, hashed from CUSTOMER_ID"""
+    hashes = pd.util.hash_pandas_object(df['CUSTOMER_ID'], index=False).to_numpy()
+    return hashes % n_shards
+
+def partition_by_customer(df, n_shards):
+    """Hash-partition rows by CUSTOMER_ID so every customer lands in exactly one shard"""
+    shard_ids = customer_shard_ids(df, n_shards)
+    
+    # One stable sort instead of a boolean mask per shard; row order is kept within each shard
+    order = np.argsort(shard_ids, kind='stable')
+    bounds = np.searchsorted(shard_ids[order], np.arange(n_shards + 1))
+    return [df.iloc[order[start:end]] for start, end in zip(bounds[:-1], bounds[1:])]
+
+def current_rss_mb():
+    """Current resident set size of this process in MB, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+def run_snapshot_shard(func, snapshot_path, n_shards, shard):
+    """Worker entry point: read one customer shard from the mapped snapshot and run func on it
+    
+    Also returns the RSS growth caused by reading the shard and the size of the mapped shard data.
+    """
+    rss_before = current_rss_mb()
+    df, mapped_bytes = read_snapshot_shard(snapshot_path, n_shards, shard)
+    rss_after = current_rss_mb()
+    
+    rss_growth = None if rss_before is None else rss_after - rss_before
+    return default_string_dtypes(func(df)), rss_growth, mapped_bytes / 2**20
+
+def run_per_customer(func, df, n_workers=None, snapshot=None):
+    """Run a per-customer computation over customer shards in a process pool and merge the results
+    
+    func must be a module-level function returning a Series or DataFrame indexed by CUSTOMER_ID
+    (optionally as one level of a MultiIndex). Shards keep the original row order and the merged
+    result is sorted by index, so it matches func(df) run in a single process.
+    
+    If snapshot is the Arrow snapshot path df was read from, each worker memory-maps only the
+    record batches for its own customer buckets instead of receiving a pickled copy.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    n_shards = max(1, min(n_workers, len(df) // MIN_ROWS_PER_SHARD))
+    if n_shards == 1:
+        return func(df).sort_index()
+    
+    with ProcessPoolExecutor(max_workers=n_shards) as pool:
+        if snapshot is None:
+            partials = list(pool.map(func, partition_by_customer(df, n_shards)))
+        else:
+            results = list(pool.map(partial(run_snapshot_shard, func, snapshot, n_shards), range(n_shards)))
+            partials = [result for result, _, _ in results]
+            rss_growth = [growth for _, growth, _ in results]
+            mapped_mb = [mapped for _, _, mapped in results]
+            if None not in rss_growth:
+                print(f"Worker RSS growth from reading snapshot shard ({n_shards} workers): "
+                      f"mean {np.mean(rss_growth):.1f} MB, max {max(rss_growth):.1f} MB, "
+                      f"against {np.mean(mapped_mb):.1f} MB mapped shard data per worker")
+    
+    # Shards with no qualifying customers would otherwise drag the merged dtypes to object
+    partials = [result for result in partials if len(result)] or partials[:1]
+    return pd.concat(partials).sort_index()
+
+def apply_with_periods(func, periods_weeks, df):
+    """Merge df with business periods, then apply func"""
+    return func(merge_with_periods(df, periods_weeks))
+
 def create_sales_over_time(orders_master, periods_weeks):
     # Merge with periods and group by period
     df = merge_with_periods(orders_master, periods_weeks)
@@ -194,8 +402,7 @@ def create_marketing_channel_chart(orders_attribution, orders_master):
 
 def create_discount_codes_pie(orders_master):
     # Replace '(not set)' with 'No Discount' before grouping
-    orders_master = orders_master.copy()
-    orders_master['DISCOUNT_CODE'] = orders_master['DISCOUNT_CODE'].replace('(not set)', 'No Discount')
+    orders_master = replace_dictionary_values(orders_master.copy(), 'DISCOUNT_CODE', '(not set)', 'No Discount')
     
     discount_revenue = orders_master.groupby('DISCOUNT_CODE')['NET_REVENUE'].sum()
     top_10_discounts = discount_revenue.nlargest(10)
@@ -212,12 +419,18 @@ def create_discount_codes_pie(orders_master):
     plt.savefig('top_discount_codes_pie.png', dpi=300, bbox_inches='tight')
     plt.close()
 
-def create_basket_size_analysis(orders_sku):
+def basket_size_summary(orders_sku):
+    """Histogram summary of items per order"""
+    basket_sizes = orders_sku.groupby('NAME')['QUANTITY'].sum()
+    return summarize_histogram(basket_sizes, bins=30)
+
+def create_basket_size_analysis(orders_sku, summary=None):
     """Analyze basket sizes"""
-    basket_sizes = orders_sku.groupby('NAME')['QUANTITY'].sum().reset_index()
+    if summary is None:
+        summary = basket_size_summary(orders_sku)
     
     plt.figure(figsize=(12, 8))
-    sns.histplot(data=basket_sizes, x='QUANTITY', bins=30, color='lightcoral', stat='count', alpha=0.8)
+    plot_histogram_summary(summary, color='lightcoral', alpha=0.8)
     plt.title('Distribution of Order Sizes', fontsize=14, pad=15)
     plt.xlabel('Items per Order', fontsize=12)
     plt.ylabel('Number of Orders (log scale)', fontsize=12)
@@ -227,11 +440,16 @@ def create_basket_size_analysis(orders_sku):
     plt.savefig('basket_size_distribution.png', dpi=300, bbox_inches='tight')
     plt.close()
 
-def create_monthly_retention_analysis(orders_master, periods_weeks):
+def customer_first_period(df):
+    """First business period each customer purchased in"""
+    return df.groupby('CUSTOMER_ID')['PERIOD'].min()
+
+def create_monthly_retention_analysis(orders_master, periods_weeks, n_workers=None):
     df = merge_with_periods(orders_master, periods_weeks)
     
-    # Get first purchase period for each customer
-    first_purchases = df.groupby('CUSTOMER_ID')['PERIOD'].min().reset_index()
+    # Get first purchase period for each customer. The snapshot holds orders without periods,
+    # so shard the already-merged frame, sending workers only the two columns they need
+    first_purchases = run_per_customer(customer_first_period, df[['CUSTOMER_ID', 'PERIOD']], n_workers).reset_index()
     first_purchases.columns = ['CUSTOMER_ID', 'FIRST_PERIOD']
     
     # Merge back to get retention by period
@@ -258,26 +476,33 @@ def create_monthly_retention_analysis(orders_master, periods_weeks):
     plt.savefig('retention_analysis.png', dpi=300, bbox_inches='tight')
     plt.close()
 
-def create_purchase_frequency_analysis(orders_master):
+def get_avg_days_between_orders(dates):
+    """Mean whole days between consecutive orders, or None for fewer than two orders"""
+    if len(dates) < 2:
+        return None
+    dates = sorted(dates)
+    differences = [(dates[i+1] - dates[i]).days for i in range(len(dates)-1)]
+    return np.mean(differences)
+
+def customer_avg_days_between_orders(df):
+    """Average days between orders for each customer"""
+    customer_orders = df.groupby('CUSTOMER_ID')['CREATED_AT'].agg(list)
+    # Float even when every customer has a single order and all averages are None
+    return customer_orders.apply(get_avg_days_between_orders).astype(float)
+
+def purchase_frequency_summary(orders_master, n_workers=None, snapshot=None):
+    """Histogram summary of average days between orders per customer"""
+    avg_days = run_per_customer(customer_avg_days_between_orders, orders_master, n_workers, snapshot)
+    return summarize_histogram(avg_days.dropna(), bins=50)
+
+def create_purchase_frequency_analysis(orders_master, summary=None, n_workers=None, snapshot=None):
     """Analyze customer purchase frequency"""
-    df = orders_master.copy()
-    
-    # Calculate days between orders for each customer
-    customer_orders = df.groupby('CUSTOMER_ID')['CREATED_AT'].agg(list).reset_index()
-    
-    # Calculate average days between orders
-    def get_avg_days_between_orders(dates):
-        if len(dates) < 2:
-            return None
-        dates = sorted(dates)
-        differences = [(dates[i+1] - dates[i]).days for i in range(len(dates)-1)]
-        return np.mean(differences)
-    
-    customer_orders['avg_days_between_orders'] = customer_orders['CREATED_AT'].apply(get_avg_days_between_orders)
+    if summary is None:
+        summary = purchase_frequency_summary(orders_master, n_workers, snapshot)
     
     # Plot distribution of purchase frequency
     plt.figure(figsize=(10, 6))
-    sns.histplot(data=customer_orders.dropna(), x='avg_days_between_orders', bins=50)
+    plot_histogram_summary(summary)
     plt.title('Distribution of Days Between Customer Purchases', fontsize=16, pad=20)
     plt.xlabel('Average Days Between Orders', fontsize=12)
     plt.ylabel('Number of Customers', fontsize=12)
@@ -302,10 +527,21 @@ def analyze_statistical_significance(orders_master):
         f.write(f"\nFirst Orders Std: £{first_orders.std():.2f}\n")
         f.write(f"Repeat Orders Std: £{repeat_orders.std():.2f}\n")
 
-def create_subscription_order_value_comparison(orders_master):
+def subscription_order_value_summary(orders_master):
+    """Box-plot summaries of order value per order type, in order of first appearance"""
+    summaries = [
+        summarize_boxplot(values, label)
+        for label, values in orders_master.groupby('SUB_ORDER', sort=False)['NET_REVENUE']
+    ]
+    return [summary for summary in summaries if summary is not None]
+
+def create_subscription_order_value_comparison(orders_master, summary=None):
     """Compare average order values between subscription and non-subscription orders"""
+    if summary is None:
+        summary = subscription_order_value_summary(orders_master)
+    
     plt.figure(figsize=(10, 6))
-    sns.boxplot(data=orders_master, x='SUB_ORDER', y='NET_REVENUE')
+    plot_boxplot_summary(summary)
     plt.title('Order Value Distribution: Subscription vs Non-Subscription', fontsize=16, pad=20)
     plt.xlabel('Order Type', fontsize=12)
     plt.ylabel('Order Value (£)', fontsize=12)
@@ -366,15 +602,15 @@ def create_free_gifts_analysis(orders_master, orders_sku):
     # Merge orders_master with orders_sku to get item information
     merged_data = pd.merge(
         orders_master,
-        orders_sku[['NAME', 'ITEM_NAME', 'FREE_GIFT_FLAG']],
+        orders_sku[['NAME', 'ITEM_NAME', 'ITEM_NAME_CAT', 'FREE_GIFT_FLAG']],
         on='NAME',
         how='left'
     )
     
     # Identify orders with free gifts using multiple criteria
     merged_data['HAS_FREE_GIFT'] = (
-        (merged_data['DISCOUNT_CODE'].str.contains('FREE', case=False, na=False)) |
-        (merged_data['ITEM_NAME'].str.contains('Gift', case=False, na=False)) |
+        predicate_flag(merged_data, 'DISCOUNT_CODE', 'free') |
+        predicate_flag(merged_data, 'ITEM_NAME', 'gift') |
         (merged_data['FREE_GIFT_FLAG'] == 1)
     )
     
@@ -483,7 +719,7 @@ def clean_data(orders_master, orders_sku, orders_attribution):
     orders_sku = orders_sku.copy()
     orders_sku['is_gift'] = (
         (orders_sku['FREE_GIFT_FLAG'] == 1) |
-        (orders_sku['ITEM_NAME'].str.contains('Gift', case=False, na=False))
+        predicate_flag(orders_sku, 'ITEM_NAME', 'gift')
     )
     
     # 3. Remove outliers for visualization purposes
@@ -505,42 +741,52 @@ def clean_data(orders_master, orders_sku, orders_attribution):
     
     return orders_master, orders_sku, orders_attribution
 
-def visualize_auto_renew_impact(orders_master, orders_sku):
-    """Create a clear table visualization of 25% auto-renew deal impact"""
-    
-    # Identify orders with 25% auto-renew deals
-    auto_renew_25_off = orders_sku[
-        orders_sku['ITEM_SKU'].str.contains('25.00% Off Auto renew', case=False, na=False) |
-        orders_sku['ITEM_NAME'].str.contains('25.00% Off Auto renew', case=False, na=False)
-    ]['NAME'].unique()
-    
-    # Get customer purchase history
-    df = orders_master.copy()
-    
-    # Calculate metrics for customers with auto-renew
+def auto_renew_customer_metrics(df, auto_renew_orders):
+    """Average days between orders before and after each customer's first auto-renew order"""
     customer_metrics = []
     
-    for customer_id in df['CUSTOMER_ID'].unique():
-        customer_orders = df[df['CUSTOMER_ID'] == customer_id].sort_values('CREATED_AT')
+    for customer_id, customer_orders in df.groupby('CUSTOMER_ID'):
+        customer_orders = customer_orders.sort_values('CREATED_AT')
+        is_auto_renew = customer_orders['NAME'].isin(auto_renew_orders)
         
-        if customer_orders['NAME'].isin(auto_renew_25_off).any():
-            first_auto_renew = customer_orders[customer_orders['NAME'].isin(auto_renew_25_off)]['CREATED_AT'].min()
+        if is_auto_renew.any():
+            first_auto_renew = customer_orders[is_auto_renew]['CREATED_AT'].min()
             
             before_dates = customer_orders[customer_orders['CREATED_AT'] < first_auto_renew]['CREATED_AT'].tolist()
             after_dates = customer_orders[customer_orders['CREATED_AT'] >= first_auto_renew]['CREATED_AT'].tolist()
             
             if len(before_dates) >= 2 and len(after_dates) >= 2:
-                def calc_avg_days(dates):
-                    dates = sorted(dates)
-                    return np.mean([(dates[i+1] - dates[i]).days for i in range(len(dates)-1)])
-                
                 customer_metrics.append({
                     'customer_id': customer_id,
-                    'avg_days_before': calc_avg_days(before_dates),
-                    'avg_days_after': calc_avg_days(after_dates)
+                    'avg_days_before': get_avg_days_between_orders(before_dates),
+                    'avg_days_after': get_avg_days_between_orders(after_dates)
                 })
     
-    metrics_df = pd.DataFrame(customer_metrics)
+    metrics_df = pd.DataFrame(customer_metrics, columns=['customer_id', 'avg_days_before', 'avg_days_after'])
+    # Fixed dtypes so customers without metrics still produce a frame that merges cleanly
+    metrics_df = metrics_df.astype({
+        'customer_id': df['CUSTOMER_ID'].dtype,
+        'avg_days_before': float,
+        'avg_days_after': float
+    })
+    return metrics_df.set_index('customer_id')
+
+def visualize_auto_renew_impact(orders_master, orders_sku, n_workers=None, snapshot=None):
+    """Create a clear table visualization of 25% auto-renew deal impact"""
+    
+    # Identify orders with 25% auto-renew deals
+    auto_renew_25_off = orders_sku[
+        predicate_flag(orders_sku, 'ITEM_SKU', 'auto_renew_25_off') |
+        predicate_flag(orders_sku, 'ITEM_NAME', 'auto_renew_25_off')
+    ]['NAME'].unique()
+    
+    # Calculate metrics for customers with auto-renew
+    metrics_df = run_per_customer(
+        partial(auto_renew_customer_metrics, auto_renew_orders=auto_renew_25_off),
+        orders_master,
+        n_workers,
+        snapshot
+    ).reset_index()
     
     # Calculate statistics
     mean_before = metrics_df['avg_days_before'].mean()
@@ -591,13 +837,19 @@ def visualize_auto_renew_impact(orders_master, orders_sku):
     
     return metrics_df
 
-def create_clv_by_period(orders_master, periods_weeks):
+def customer_period_revenue(df):
+    """Revenue per customer within each business period"""
+    return df.groupby(['PERIOD', 'CUSTOMER_ID'])['NET_REVENUE'].sum()
+
+def create_clv_by_period(orders_master, periods_weeks, n_workers=None, snapshot=None):
     """Create visualization of average Customer Lifetime Value by business period"""
-    # Merge with periods reference
-    df = merge_with_periods(orders_master, periods_weeks)
-    
     # Calculate average CLV by period
-    clv_by_period = df.groupby(['PERIOD', 'CUSTOMER_ID'])['NET_REVENUE'].sum().reset_index()
+    clv_by_period = run_per_customer(
+        partial(apply_with_periods, customer_period_revenue, periods_weeks),
+        orders_master,
+        n_workers,
+        snapshot
+    ).reset_index()
     avg_clv_by_period = clv_by_period.groupby('PERIOD')['NET_REVENUE'].mean().reset_index()
     
     # Create visualization
@@ -624,15 +876,198 @@ def create_clv_by_period(orders_master, periods_weeks):
     plt.savefig('customer_lifetime_value.png', dpi=300, bbox_inches='tight')
     plt.close()
 
-def main():
-    # Load data
-    orders_master, orders_sku, orders_attribution, periods_weeks = load_data()
+def snapshot_fingerprint(data_dir):
+    """Hash of the input CSVs' sizes and modification times plus this module's source"""
+    inputs = []
+    for filename in INPUT_FILES:
+        file_stat = os.stat(os.path.join(data_dir, filename))
+        inputs.append([filename, file_stat.st_size, file_stat.st_mtime_ns])
+    
+    # Cleaning depends on predicates and encoders defined across the module, so any edit to it
+    # invalidates snapshots built by the old code
+    with open(os.path.abspath(__file__), 'rb') as f:
+        module_source = f.read()
+    
+    fingerprint = hashlib.sha256(json.dumps(inputs).encode())
+    fingerprint.update(module_source)
+    return fingerprint.hexdigest()
+
+def write_snapshot(tables, snapshot_dir, fingerprint):
+    """Write each table to an uncompressed, single-batch Arrow IPC file so it can be memory-mapped
+    
+    Tables with CUSTOMER_ID are sorted by customer hash bucket, keeping the original row order
+    within each bucket, and the bucket offsets are stored in the schema metadata so workers can
+    slice out a contiguous range of customers.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    
+    # Drop the manifest first so a rebuild that fails partway is never mistaken for a valid snapshot
+    manifest_path = os.path.join(snapshot_dir, 'manifest.json')
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    
+    for name, df in tables.items():
+        # Categorical copies are rebuilt on load, so keep them out of the file
+        df = df.drop(columns=[f'{column}_CAT' for column in DICTIONARY_COLUMNS], errors='ignore')
+        
+        if 'CUSTOMER_ID' in df.columns:
+            buckets = customer_shard_ids(df, SNAPSHOT_BUCKETS).astype(np.int64)
+            order = np.argsort(buckets, kind='stable')
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(buckets, minlength=SNAPSHOT_BUCKETS))])
+            batch = pa.RecordBatch.from_pandas(df.iloc[order])
+            batch = batch.replace_schema_metadata({
+                **batch.schema.metadata,
+                b'bucket_offsets': json.dumps(offsets.tolist()).encode()
+            })
+        else:
+            batch = pa.RecordBatch.from_pandas(df)
+        
+        # Write beside the old file and swap it in, so runs that still map the old file keep
+        # a valid mapping instead of seeing it truncated underneath them
+        path = os.path.join(snapshot_dir, f'{name}.arrow')
+        with pa.OSFile(f'{path}.tmp', 'wb') as sink:
+            with pa.ipc.new_file(sink, batch.schema) as writer:
+                writer.write_batch(batch)
+        os.replace(f'{path}.tmp', path)
+    
+    # Manifest goes last, so only a complete snapshot is ever reused
+    with open(f'{manifest_path}.tmp', 'w') as f:
+        json.dump({'fingerprint': fingerprint, 'tables': list(tables)}, f)
+    os.replace(f'{manifest_path}.tmp', manifest_path)
+
+def read_snapshot(path):
+    """Memory-map an Arrow IPC snapshot as a DataFrame
     
-    # Clean data
-    orders_master, orders_sku, orders_attribution = clean_data(
-        orders_master, orders_sku, orders_attribution
+    Null-free fixed-width columns are zero-copy views of the mapped file.
+    """
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return table.to_pandas(split_blocks=True)
+
+def arrow_string_dtype(arrow_type):
+    """Keep string columns Arrow-backed so they are not copied into Python objects"""
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+def read_snapshot_shard(path, n_shards, shard):
+    """Memory-map only the customer buckets belonging to one shard of a bucketed snapshot
+    
+    Each shard takes a contiguous range of buckets, so every customer lands in exactly one shard
+    and the shard is a single zero-copy slice of the mapped batch. Null-free fixed-width columns
+    stay views of the file and strings stay Arrow-backed. Returns the shard as a DataFrame and
+    the size in bytes of the mapped slice.
+    """
+    reader = pa.ipc.open_file(pa.memory_map(path))
+    offsets = json.loads(reader.schema.metadata[b'bucket_offsets'])
+    n_buckets = len(offsets) - 1
+    first_bucket = shard * n_buckets // n_shards
+    last_bucket = (shard + 1) * n_buckets // n_shards
+    
+    batch = reader.get_batch(0).slice(offsets[first_bucket], offsets[last_bucket] - offsets[first_bucket])
+    table = pa.Table.from_batches([batch])
+    return table.to_pandas(split_blocks=True, types_mapper=arrow_string_dtype), table.nbytes
+
+def default_string_dtypes(result):
+    """Convert Arrow-backed string columns and index levels to the dtypes read_snapshot gives
+    
+    Workers read strings as pd.ArrowDtype to avoid copies; converting their (small) results back
+    keeps the merged output identical to a single-process run on the parent's frame.
+    """
+    if isinstance(result, pd.Series):
+        return default_string_dtypes(result.to_frame()).iloc[:, 0].rename(result.name)
+    
+    index_names = list(result.index.names)
+    frame = result.reset_index()
+    for column in frame.columns:
+        dtype = frame[column].dtype
+        if isinstance(dtype, pd.ArrowDtype) and arrow_string_dtype(dtype.pyarrow_dtype) is not None:
+            frame[column] = pa.array(frame[column].array).to_pandas().array
+    
+    frame = frame.set_index(list(frame.columns[:len(index_names)]))
+    frame.index.names = index_names
+    return frame
+
+def snapshot_is_current(snapshot_dir, fingerprint):
+    """Whether the snapshot manifest matches the current inputs"""
+    manifest_path = os.path.join(snapshot_dir, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return False
+    with open(manifest_path) as f:
+        return json.load(f).get('fingerprint') == fingerprint
+
+def load_snapshot(snapshot_dir=None):
+    """Load the cleaned tables from the Arrow snapshot, rebuilding it when the inputs or code change
+    
+    Returns the four tables plus a dict of table name -> snapshot path for worker processes.
+    Tables with CUSTOMER_ID come back sorted by customer hash bucket rather than in CSV order.
+    """
+    data_dir = get_data_dir()
+    snapshot_dir = snapshot_dir or os.path.join(data_dir, 'snapshot')
+    fingerprint = snapshot_fingerprint(data_dir)
+    
+    if snapshot_is_current(snapshot_dir, fingerprint):
+        print(f"Reusing data snapshot in {snapshot_dir}")
+    else:
+        orders_master, orders_sku, orders_attribution, periods_weeks = load_data()
+        orders_master, orders_sku, orders_attribution = clean_data(
+            orders_master, orders_sku, orders_attribution
+        )
+        write_snapshot(
+            dict(zip(SNAPSHOT_TABLES, [orders_master, orders_sku, orders_attribution, periods_weeks])),
+            snapshot_dir,
+            fingerprint
+        )
+        print(f"Wrote data snapshot to {snapshot_dir}")
+    
+    paths = {name: os.path.join(snapshot_dir, f'{name}.arrow') for name in SNAPSHOT_TABLES}
+    orders_master, orders_sku, orders_attribution, periods_weeks = (
+        read_snapshot(paths[name]) for name in SNAPSHOT_TABLES
     )
     
+    # Re-encode product/discount columns on the mapped tables
+    build_dictionary_index(orders_master)
+    build_dictionary_index(orders_sku)
+    
+    return orders_master, orders_sku, orders_attribution, periods_weeks, paths
+
+def distribution_summaries(orders_master, orders_sku, snapshot=None):
+    """Histogram and box-plot summaries for the large distribution plots"""
+    return {
+        'basket_size': basket_size_summary(orders_sku),
+        'purchase_frequency': purchase_frequency_summary(orders_master, snapshot=snapshot),
+        'subscription_order_value': subscription_order_value_summary(orders_master)
+    }
+
+def load_distribution_summaries(orders_master, orders_sku, snapshot_paths):
+    """Distribution summaries, cached next to the snapshot they were computed from
+    
+    The cache records the snapshot fingerprint, so it is recomputed whenever the snapshot is rebuilt.
+    """
+    snapshot_dir = os.path.dirname(snapshot_paths['orders_master'])
+    with open(os.path.join(snapshot_dir, 'manifest.json')) as f:
+        fingerprint = json.load(f)['fingerprint']
+    
+    cache_path = os.path.join(snapshot_dir, 'summaries.pkl')
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+        if cached['fingerprint'] == fingerprint:
+            return cached['summaries']
+    
+    summaries = distribution_summaries(orders_master, orders_sku, snapshot_paths['orders_master'])
+    with open(f'{cache_path}.tmp', 'wb') as f:
+        pickle.dump({'fingerprint': fingerprint, 'summaries': summaries}, f)
+    os.replace(f'{cache_path}.tmp', cache_path)
+    return summaries
+
+def main():
+    # Load cleaned data, reusing the Arrow snapshot while the inputs are unchanged
+    orders_master, orders_sku, orders_attribution, periods_weeks, snapshot_paths = load_snapshot()
+    orders_snapshot = snapshot_paths['orders_master']
+    
+    # Distribution summaries are cached alongside the snapshot
+    summaries = load_distribution_summaries(orders_master, orders_sku, snapshot_paths)
+    
     # Calculate total revenue
     calculate_total_revenue(orders_master)
     
@@ -647,16 +1082,16 @@ def main():
     create_subscription_analysis(orders_master)
     create_order_value_barplot(orders_master)
     create_discount_usage_analysis(orders_master)
-    create_basket_size_analysis(orders_sku)
+    create_basket_size_analysis(orders_sku, summaries['basket_size'])
     create_monthly_retention_analysis(orders_master, periods_weeks)
-    create_purchase_frequency_analysis(orders_master)
+    create_purchase_frequency_analysis(orders_master, summaries['purchase_frequency'])
     analyze_statistical_significance(orders_master)
-    create_subscription_order_value_comparison(orders_master)
+    create_subscription_order_value_comparison(orders_master, summaries['subscription_order_value'])
     create_marketing_channel_by_customer_type(orders_attribution, orders_master)
     create_free_gifts_analysis(orders_master, orders_sku)
     create_product_popularity_by_customer_type(orders_sku, orders_master)
-    visualize_auto_renew_impact(orders_master, orders_sku)
-    create_clv_by_period(orders_master, periods_weeks)
+    visualize_auto_renew_impact(orders_master, orders_sku, snapshot=orders_snapshot)
+    create_clv_by_period(orders_master, periods_weeks, snapshot=orders_snapshot)
     
     print("All visualizations have been created successfully!")
 
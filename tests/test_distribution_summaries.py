@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from matplotlib import cbook
+
+from pm_tech_test import create_final_visualisations as cfv
+from tests.test_run_per_customer import make_orders
+
+
+class DistributionSummaryTest(unittest.TestCase):
+    """Summaries must match what the plotting libraries computed from raw rows"""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.values = np.concatenate([rng.gamma(2, 20, 5000), rng.uniform(300, 900, 50), [np.nan] * 10])
+
+    def test_boxplot_matches_matplotlib(self):
+        summary = cfv.summarize_boxplot(self.values, 'orders', max_fliers=len(self.values))
+        expected = cbook.boxplot_stats(self.values[~np.isnan(self.values)], whis=1.5)[0]
+
+        for key in ['q1', 'med', 'q3', 'whislo', 'whishi']:
+            self.assertAlmostEqual(summary[key], expected[key], msg=key)
+        np.testing.assert_array_equal(np.sort(summary['fliers']), np.sort(expected['fliers']))
+
+    def test_boxplot_caps_fliers_to_a_sample(self):
+        all_fliers = cfv.summarize_boxplot(self.values, 'orders', max_fliers=len(self.values))['fliers']
+        capped = cfv.summarize_boxplot(self.values, 'orders', max_fliers=20)['fliers']
+
+        self.assertGreater(len(all_fliers), 20)
+        self.assertEqual(len(capped), 20)
+        self.assertTrue(np.isin(capped, all_fliers).all())
+
+    def test_histogram_matches_numpy(self):
+        values = self.values[~np.isnan(self.values)]
+        for bins in [30, 50]:
+            with self.subTest(bins=bins):
+                summary = cfv.summarize_histogram(self.values, bins)
+                np.testing.assert_array_equal(summary['edges'], np.histogram_bin_edges(values, bins=bins))
+                np.testing.assert_array_equal(summary['counts'], np.histogram(values, bins=bins)[0])
+
+    def test_missing_only_groups_are_skipped(self):
+        self.assertIsNone(cfv.summarize_boxplot([np.nan, np.nan], 'empty'))
+        self.assertEqual(len(cfv.summarize_histogram([np.nan], 30)['counts']), 0)
+
+        orders = pd.DataFrame({'SUB_ORDER': ['Subscription', 'One-off', 'One-off'],
+                               'NET_REVENUE': [10.0, np.nan, np.nan]})
+        labels = [summary['label'] for summary in cfv.subscription_order_value_summary(orders)]
+        self.assertEqual(labels, ['Subscription'])
+
+
+class DistributionSummaryCacheTest(unittest.TestCase):
+
+    def test_summaries_reused_until_snapshot_changes(self):
+        orders, _, _ = make_orders()
+        sku = pd.DataFrame({'NAME': orders['NAME'], 'QUANTITY': 1})
+
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            paths = {'orders_master': os.path.join(snapshot_dir, 'orders_master.arrow')}
+            cfv.write_snapshot({'orders_master': orders}, snapshot_dir, fingerprint='first')
+            first = cfv.load_distribution_summaries(orders, sku, paths)
+
+            with mock.patch.object(cfv, 'distribution_summaries') as recompute:
+                cached = cfv.load_distribution_summaries(orders, sku, paths)
+            recompute.assert_not_called()
+            np.testing.assert_array_equal(cached['basket_size']['counts'], first['basket_size']['counts'])
+
+            cfv.write_snapshot({'orders_master': orders}, snapshot_dir, fingerprint='second')
+            with mock.patch.object(cfv, 'distribution_summaries', return_value={}) as recompute:
+                cfv.load_distribution_summaries(orders, sku, paths)
+            recompute.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pm_tech_test import create_final_visualisations as cfv
+
+
+def contains(series, predicate):
+    return series.str.contains(cfv.STRING_PREDICATES[predicate], case=False, na=False)
+
+
+class PredicateFlagTest(unittest.TestCase):
+    """Dictionary-encoded predicates must match a per-row str.contains"""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.orders = pd.DataFrame({
+            'NAME': [f'#{i}' for i in range(200)],
+            'DISCOUNT_CODE': rng.choice(['(not set)', 'FREESHIP', 'WELCOME10', 'freegift', None], 200)
+        })
+        self.sku = pd.DataFrame({
+            'NAME': [f'#{i}' for i in rng.integers(0, 150, 300)],
+            'ITEM_SKU': rng.choice(['SKU1', 'SKU2 - 25.00% OFF AUTO RENEW', None], 300),
+            'ITEM_NAME': rng.choice(['Coffee', 'Free Gift Mug', 'Beans 25.00% Off Auto renew', None], 300)
+        })
+        cfv.build_dictionary_index(self.orders)
+        cfv.build_dictionary_index(self.sku)
+
+    def test_matches_str_contains(self):
+        for df, column, predicate in [
+            (self.orders, 'DISCOUNT_CODE', 'free'),
+            (self.sku, 'ITEM_NAME', 'gift'),
+            (self.sku, 'ITEM_NAME', 'auto_renew_25_off'),
+            (self.sku, 'ITEM_SKU', 'auto_renew_25_off')
+        ]:
+            with self.subTest(column=column, predicate=predicate):
+                pd.testing.assert_series_equal(
+                    cfv.predicate_flag(df, column, predicate),
+                    contains(df[column], predicate),
+                    check_names=False
+                )
+
+    def test_left_merge_missing_codes(self):
+        merged = self.orders.merge(self.sku[['NAME', 'ITEM_NAME', 'ITEM_NAME_CAT']], on='NAME', how='left')
+        self.assertTrue((merged['ITEM_NAME_CAT'].cat.codes == -1).any())
+        for column, predicate in [('ITEM_NAME', 'gift'), ('DISCOUNT_CODE', 'free')]:
+            with self.subTest(column=column):
+                pd.testing.assert_series_equal(
+                    cfv.predicate_flag(merged, column, predicate),
+                    contains(merged[column], predicate),
+                    check_names=False
+                )
+
+    def test_frames_without_encoding(self):
+        raw = self.orders.drop(columns='DISCOUNT_CODE_CAT')
+        cfv.category_flags.cache_clear()
+        for _ in range(5):
+            flags = cfv.predicate_flag(raw, 'DISCOUNT_CODE', 'free')
+        pd.testing.assert_series_equal(flags, contains(raw['DISCOUNT_CODE'], 'free'), check_names=False)
+        self.assertEqual(cfv.category_flags.cache_info().currsize, 1)
+
+    def test_replace_keeps_encoding_in_sync(self):
+        orders = cfv.replace_dictionary_values(self.orders.copy(), 'DISCOUNT_CODE', 'WELCOME10', 'FREE10')
+        pd.testing.assert_series_equal(
+            cfv.predicate_flag(orders, 'DISCOUNT_CODE', 'free'),
+            contains(orders['DISCOUNT_CODE'], 'free'),
+            check_names=False
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from functools import partial
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from pm_tech_test import create_final_visualisations as cfv
+
+
+def make_orders(n_orders=4000, n_customers=300, seed=0):
+    """Synthetic orders with repeat customers, auto-renew orders and missing revenue"""
+    rng = np.random.default_rng(seed)
+    orders = pd.DataFrame({
+        'NAME': [f'#{i}' for i in range(n_orders)],
+        'CUSTOMER_ID': rng.integers(0, n_customers, n_orders),
+        'CREATED_AT': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 700 * 24, n_orders), unit='h'),
+        'NET_REVENUE': rng.gamma(2, 20, n_orders),
+        'SUB_ORDER': rng.choice(['Subscription', 'One-off'], n_orders)
+    })
+    orders.loc[rng.random(n_orders) < 0.01, 'NET_REVENUE'] = np.nan
+    auto_renew_orders = orders['NAME'].to_numpy()[rng.random(n_orders) < 0.2]
+
+    periods_weeks = pd.DataFrame({'DATE': pd.date_range('2023-01-01', periods=700).strftime('%Y-%m-%d')})
+    periods_weeks['PERIOD'] = np.arange(700) // 28
+
+    return orders, auto_renew_orders, periods_weeks
+
+
+class RunPerCustomerTest(unittest.TestCase):
+    """Sharded results must match single-process output exactly"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.orders, auto_renew_orders, periods_weeks = make_orders()
+        cls.kernels = {
+            'avg_days_between_orders': cfv.customer_avg_days_between_orders,
+            'auto_renew_metrics': partial(cfv.auto_renew_customer_metrics, auto_renew_orders=auto_renew_orders),
+            'first_period': partial(cfv.apply_with_periods, cfv.customer_first_period, periods_weeks),
+            'period_revenue': partial(cfv.apply_with_periods, cfv.customer_period_revenue, periods_weeks)
+        }
+
+    def assert_same_result(self, expected, result):
+        if isinstance(expected, pd.Series):
+            pd.testing.assert_series_equal(result, expected)
+        else:
+            pd.testing.assert_frame_equal(result, expected)
+
+    def test_process_pool_matches_single_process(self):
+        for name, func in self.kernels.items():
+            with self.subTest(kernel=name):
+                expected = cfv.run_per_customer(func, self.orders, n_workers=1)
+                self.assertGreater(len(expected), 0)
+
+                with mock.patch.object(cfv, 'MIN_ROWS_PER_SHARD', 100):
+                    result = cfv.run_per_customer(func, self.orders, n_workers=4)
+                self.assert_same_result(expected, result)
+
+    def test_sparse_results_keep_dtypes(self):
+        orders = self.orders.copy()
+        # Most customers order once, so most shards have no intervals at all
+        orders['CUSTOMER_ID'] = np.where(orders['CUSTOMER_ID'] < 3, orders['CUSTOMER_ID'], np.arange(len(orders)) + 1000)
+        # A single auto-renew customer leaves every other shard without metrics
+        customer_orders = orders[orders['CUSTOMER_ID'] == 0].sort_values('CREATED_AT')
+        auto_renew_orders = customer_orders['NAME'].iloc[[len(customer_orders) // 2]].to_numpy()
+
+        for name, func in [
+            ('avg_days_between_orders', cfv.customer_avg_days_between_orders),
+            ('auto_renew_metrics', partial(cfv.auto_renew_customer_metrics, auto_renew_orders=auto_renew_orders))
+        ]:
+            with self.subTest(kernel=name):
+                expected = cfv.run_per_customer(func, orders, n_workers=1)
+                self.assertGreater(len(expected.dropna()), 0)
+
+                with mock.patch.object(cfv, 'MIN_ROWS_PER_SHARD', 100):
+                    result = cfv.run_per_customer(func, orders, n_workers=8)
+                self.assert_same_result(expected, result)
+
+    def test_snapshot_workers_match_single_process(self):
+        string_ids = self.orders.assign(CUSTOMER_ID='C' + self.orders['CUSTOMER_ID'].astype(str))
+
+        for id_type, orders in [('int', self.orders), ('str', string_ids)]:
+            with tempfile.TemporaryDirectory() as snapshot_dir:
+                cfv.write_snapshot({'orders_master': orders}, snapshot_dir, fingerprint='test')
+                snapshot = os.path.join(snapshot_dir, 'orders_master.arrow')
+                snapshot_orders = cfv.read_snapshot(snapshot)
+
+                for name, func in self.kernels.items():
+                    with self.subTest(customer_id=id_type, kernel=name):
+                        expected = cfv.run_per_customer(func, orders, n_workers=1)
+
+                        with mock.patch.object(cfv, 'MIN_ROWS_PER_SHARD', 100):
+                            result = cfv.run_per_customer(func, snapshot_orders, n_workers=4, snapshot=snapshot)
+                        self.assert_same_result(expected, result)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pyarrow as pa
+
+from pm_tech_test import create_final_visualisations as cfv
+from tests.test_run_per_customer import make_orders
+
+
+def mapped_ranges(path):
+    """Address ranges where this process has mapped the given file, read from /proc/self/maps"""
+    path = os.path.realpath(path)
+    ranges = []
+    with open('/proc/self/maps') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 6 and fields[5] == path:
+                start, end = (int(address, 16) for address in fields[0].split('-'))
+                ranges.append((start, end))
+    return ranges
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.orders, _, _ = make_orders()
+        self.snapshot_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.snapshot_dir.cleanup)
+        cfv.write_snapshot({'orders_master': self.orders}, self.snapshot_dir.name, fingerprint='test')
+        self.path = os.path.join(self.snapshot_dir.name, 'orders_master.arrow')
+
+    def assert_in_mapping(self, values):
+        address = values.__array_interface__['data'][0]
+        ranges = mapped_ranges(self.path)
+        self.assertTrue(any(start <= address < end for start, end in ranges),
+                        'column data was copied out of the mapped snapshot')
+
+    def test_columns_share_mapped_memory(self):
+        if not os.path.exists('/proc/self/maps'):
+            self.skipTest('needs /proc/self/maps')
+
+        self.assert_in_mapping(cfv.read_snapshot(self.path)['CUSTOMER_ID'].to_numpy())
+        shard, _ = cfv.read_snapshot_shard(self.path, n_shards=4, shard=1)
+        self.assert_in_mapping(shard['CUSTOMER_ID'].to_numpy())
+        self.assert_in_mapping(shard['CREATED_AT'].to_numpy())
+
+    def test_shards_cover_every_row_once_and_keep_customers_whole(self):
+        shards = [cfv.read_snapshot_shard(self.path, n_shards=5, shard=shard)[0] for shard in range(5)]
+        self.assertEqual(sum(len(shard) for shard in shards), len(self.orders))
+
+        customers = [set(shard['CUSTOMER_ID']) for shard in shards]
+        self.assertEqual(sum(len(ids) for ids in customers), len(set().union(*customers)))
+
+    def test_interrupted_rebuild_is_not_reused(self):
+        self.assertTrue(cfv.snapshot_is_current(self.snapshot_dir.name, 'test'))
+
+        # A table that cannot be converted fails the rebuild after the manifest is removed
+        with self.assertRaises(Exception):
+            cfv.write_snapshot({'orders_master': self.orders.assign(NET_REVENUE=[object()] * len(self.orders))},
+                               self.snapshot_dir.name, fingerprint='test')
+        self.assertFalse(cfv.snapshot_is_current(self.snapshot_dir.name, 'test'))
+
+    def test_bucket_offsets_stored_in_schema(self):
+        shard, _ = cfv.read_snapshot_shard(self.path, n_shards=1, shard=0)
+        self.assertEqual(len(shard), len(self.orders))
+
+        reader_offsets = json.loads(
+            pa.ipc.open_file(pa.memory_map(self.path)).schema.metadata[b'bucket_offsets']
+        )
+        self.assertEqual(len(reader_offsets), cfv.SNAPSHOT_BUCKETS + 1)
+        self.assertTrue(np.all(np.diff(reader_offsets) >= 0))
+
+
+if __name__ == '__main__':
+    unittest.main()